@@ -8,6 +8,7 @@ from twitch_analyzer import (
     find_top_windows,
     find_least_active_window,
     find_least_active_windows_for_tops,
+    format_time,
     load_chat_data,
     plot_chat_activity,
     main
@@ -32,17 +33,34 @@ class TestTwitchAnalyzer(unittest.TestCase):
         top_windows = find_top_windows(frequency, num_top_windows=2)
         self.assertEqual(top_windows, [(3, 4), (1, 3)])
 
+    def test_find_top_windows_ties_ordered_by_time(self):
+        frequency = [(0, 1), (1, 3), (2, 1), (3, 3), (4, 1), (5, 5), (6, 1)]
+        top_windows = find_top_windows(frequency, num_top_windows=2)
+        self.assertEqual(top_windows, [(5, 5), (1, 3)])
+
     def test_find_least_active_window(self):
         frequency = [(0, 2), (1, 1), (2, 3), (3, 2)]
         least_active = find_least_active_window(frequency, target_window=3, lookback_seconds=30, window_size=10)
         self.assertEqual(least_active, (1, 1))
 
+    def test_find_least_active_window_ignores_windows_outside_lookback(self):
+        frequency = [(0, 0), (5, 1), (6, 4), (8, 2), (9, 0)]
+        least_active = find_least_active_window(frequency, target_window=8, lookback_seconds=30, window_size=10)
+        self.assertEqual(least_active, (5, 1))
+
     def test_find_least_active_windows_for_tops(self):
         frequency = [(0, 2), (1, 1), (2, 3), (3, 2)]
         top_windows = [(2, 3)]
         least_active = find_least_active_windows_for_tops(frequency, top_windows, lookback_seconds=30, window_size=10)
         self.assertEqual(least_active, [(1, 1)])
 
+    def test_format_time(self):
+        self.assertEqual(format_time(0), "0:00:00")
+        self.assertEqual(format_time(3665), "1:01:05")
+        self.assertEqual(format_time(12.0), "0:00:12")
+        self.assertEqual(format_time(86400), "1 day, 0:00:00")
+        self.assertEqual(format_time(2 * 86400 + 61), "2 days, 0:01:01")
+
     def test_load_chat_data(self):
         with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_file:
             json.dump(self.sample_chat_data, temp_file)
@@ -52,6 +70,16 @@ class TestTwitchAnalyzer(unittest.TestCase):
         
         os.unlink(temp_file.name)
 
+    @patch('twitch_analyzer.orjson', None)
+    def test_load_chat_data_without_orjson(self):
+        with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_file:
+            json.dump(self.sample_chat_data, temp_file)
+
+        loaded_data = load_chat_data(temp_file.name)
+        self.assertEqual(loaded_data, self.sample_chat_data)
+
+        os.unlink(temp_file.name)
+
     @patch('matplotlib.pyplot.savefig')
     def test_plot_chat_activity(self, mock_savefig):
         frequency = [(0, 1), (1, 2), (2, 3)]
@@ -92,6 +120,25 @@ class TestTwitchAnalyzer(unittest.TestCase):
             finally:
                 os.chdir(original_dir)
 
+    @patch('twitch_analyzer.orjson', None)
+    @patch('twitch_analyzer.load_chat_data')
+    def test_main_function_without_orjson(self, mock_load_data):
+        mock_load_data.return_value = self.sample_chat_data
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original_dir = os.getcwd()
+            os.chdir(temp_dir)
+
+            try:
+                main('test.json')
+
+                with open('slopes_data.json', 'r') as f:
+                    peaks_data = json.load(f)
+
+                self.assertIsInstance(peaks_data, list)
+            finally:
+                os.chdir(original_dir)
+
     @patch('twitch_analyzer.load_chat_data')
     def test_main_function_output_formatting(self, mock_load_data):
         mock_load_data.return_value = self.sample_chat_data
@@ -1,53 +1,71 @@
+import heapq
 import json
-from collections import defaultdict
-from datetime import timedelta
+import math
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 import argparse
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SLOPES_DATA_FILE = 'slopes_data.json'
+ACTIVITY_IMAGE_FILE = 'chat_activity_analysis.png'
 
 def load_chat_data(file_path):
+    if orjson is not None:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
     with open(file_path, 'r') as f:
         return json.load(f)
 
+@lru_cache(maxsize=4096)
+def format_time(seconds):
+    days, rem = divmod(int(seconds), 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, secs = divmod(rem, 60)
+    clock = f"{hours}:{minutes:02d}:{secs:02d}"
+    if days:
+        return f"{days} day{'' if abs(days) == 1 else 's'}, {clock}"
+    return clock
+
 def calculate_message_frequency(chat_data, window_size=10):
-    frequency = defaultdict(int)
-    for msg in chat_data:
-        frequency[msg['time_in_seconds'] // window_size] += 1
-    return sorted(frequency.items(), key=lambda x: x[0])
+    times = map(itemgetter('time_in_seconds'), chat_data)
+    frequency = Counter(time // window_size for time in times)
+    return sorted(frequency.items())
 
 def find_least_active_window(frequency, target_window, lookback_seconds, window_size):
+    # frequency is sorted by window, so (window,) bisects before any (window, count)
     start_window = max(0, target_window - lookback_seconds // window_size)
-    relevant_windows = [
-        (time, count) for time, count in frequency 
-        if start_window <= time < target_window
-    ]
+    lo = bisect_left(frequency, (start_window,))
+    hi = bisect_left(frequency, (target_window,), lo)
+    relevant_windows = frequency[lo:hi]
     if not relevant_windows:
         return None
-    min_count = min(count for _, count in relevant_windows)
-    return min((time, count) for time, count in relevant_windows if count == min_count)
+    return min(relevant_windows, key=itemgetter(1))
 
 def find_top_windows(frequency, num_top_windows):
-    peaks = []
-    for i in range(1, len(frequency) - 1):
-        prev_time, prev_count = frequency[i-1]
-        curr_time, curr_count = frequency[i]
-        next_time, next_count = frequency[i+1]
-        
-        if curr_count >= prev_count and curr_count > next_count:
-            peaks.append((curr_time, curr_count))
-    
-    return sorted(peaks, key=lambda x: (-x[1], x[0]))[:num_top_windows]
+    # Stream local maxima straight into the bounded heap instead of collecting them all
+    peaks = (
+        (curr_time, curr_count)
+        for (_, prev_count), (curr_time, curr_count), (_, next_count)
+        in zip(frequency, islice(frequency, 1, None), islice(frequency, 2, None))
+        if prev_count <= curr_count > next_count
+    )
+    return heapq.nsmallest(num_top_windows, peaks, key=lambda x: (-x[1], x[0]))
 
 def find_least_active_window_after(frequency, target_window, lookahead_seconds, window_size):
     end_window = min(target_window + lookahead_seconds // window_size, len(frequency) - 1)
-    relevant_windows = [
-        (time, count) for time, count in frequency 
-        if target_window < time <= end_window
-    ]
+    lo = bisect_right(frequency, (target_window, math.inf))
+    hi = bisect_right(frequency, (end_window, math.inf), lo)
+    relevant_windows = frequency[lo:hi]
     if not relevant_windows:
         return None
-    min_count = min(count for _, count in relevant_windows)
-    return min((time, count) for time, count in relevant_windows if count == min_count)
+    return min(relevant_windows, key=itemgetter(1))
 
 def find_least_active_windows_for_tops(frequency, top_windows, lookback_seconds, window_size):
     least_active_before = []
@@ -57,6 +75,12 @@ def find_least_active_windows_for_tops(frequency, top_windows, lookback_seconds,
     return least_active_before
 
 def plot_chat_activity(frequency, top_windows, least_active_before, window_size):
+    # Imported here so runs without --generate-image don't pay for matplotlib
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import FuncFormatter
+
     plt.figure(figsize=(30, 10))
     times, counts = zip(*frequency)
     plt.plot([t * window_size for t in times], counts, label='Message Frequency')
@@ -74,16 +98,16 @@ def plot_chat_activity(frequency, top_windows, least_active_before, window_size)
     plt.title('Chat Activity Analysis')
     plt.legend()
     plt.grid(True)
-    plt.gca().xaxis.set_major_formatter(FuncFormatter(lambda x, _: str(timedelta(seconds=int(x)))))
+    plt.gca().xaxis.set_major_formatter(FuncFormatter(lambda x, _: format_time(x)))
     plt.gcf().autofmt_xdate()
-    plt.xlim(0, max(times) * window_size)
+    plt.xlim(0, times[-1] * window_size)
     plt.tight_layout()
-    plt.savefig('chat_activity_analysis.png', dpi=300)
+    plt.savefig(ACTIVITY_IMAGE_FILE, dpi=300)
     plt.close()
 
 def main(file_path, window_size=4, num_top_windows=50, generate_image=False, lookback_seconds=60):
-    chat_data = load_chat_data(file_path)
-    frequency = calculate_message_frequency(chat_data, window_size)
+    # Only the window counts are needed from here on, so don't keep the parsed chat alive
+    frequency = calculate_message_frequency(load_chat_data(file_path), window_size)
     top_windows = find_top_windows(frequency, num_top_windows)
     least_active_before = find_least_active_windows_for_tops(frequency, top_windows, lookback_seconds, window_size)
 
@@ -91,19 +115,21 @@ def main(file_path, window_size=4, num_top_windows=50, generate_image=False, loo
     paired_windows = sorted(zip(least_active_before, top_windows), key=lambda x: x[0][0])
 
     print(f"Top {num_top_windows} windows with most frequent messages and their preceding least active windows:")
-    for (before_time, before_count), (top_time, top_count) in paired_windows:
-        print(f"Least Active Before - Time: {timedelta(seconds=before_time * window_size)}, Message count: {before_count}")
-        print(f"Top - Time: {timedelta(seconds=top_time * window_size)}, Message count: {top_count}")
-        print()
+    # Build the whole report first so it goes out in a single write
+    report = "".join(
+        f"Least Active Before - Time: {format_time(before_time * window_size)}, Message count: {before_count}\n"
+        f"Top - Time: {format_time(top_time * window_size)}, Message count: {top_count}\n\n"
+        for (before_time, before_count), (top_time, top_count) in paired_windows
+    )
+    print(report, end="")
 
     if generate_image:
         plot_chat_activity(frequency, top_windows, least_active_before, window_size)
-        print("Chat activity analysis image saved as 'chat_activity_analysis.png'")
+        print(f"Chat activity analysis image saved as '{ACTIVITY_IMAGE_FILE}'")
 
     # Prepare data for JSON output
-    json_data = []
-    for (before_time, before_count), (top_time, top_count) in paired_windows:
-        json_data.append({
+    json_data = [
+        {
             "time": before_time * window_size,
             "before": {
                 "time": before_time * window_size,
@@ -113,11 +139,17 @@ def main(file_path, window_size=4, num_top_windows=50, generate_image=False, loo
                 "time": top_time * window_size,
                 "count": top_count
             }
-        })
+        }
+        for (before_time, before_count), (top_time, top_count) in paired_windows
+    ]
 
-    with open('slopes_data.json', 'w') as f:
-        json.dump(json_data, f, indent=2)
-    print("Activity data for browser extension saved as 'slopes_data.json'")
+    if orjson is not None:
+        with open(SLOPES_DATA_FILE, 'wb') as f:
+            f.write(orjson.dumps(json_data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(SLOPES_DATA_FILE, 'w') as f:
+            json.dump(json_data, f, indent=2)
+    print(f"Activity data for browser extension saved as '{SLOPES_DATA_FILE}'")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Analyze Twitch VOD chat activity")